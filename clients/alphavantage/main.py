@@ -7,10 +7,12 @@ class AlphaVantageClient:
     def __init__(self, api_key: str):
         self.api_key = api_key
 
-    def get_price_timeseries_alphavantage(self, tickers, start_date, end_date):
+    def get_price_timeseries_alphavantage(
+        self, tickers, start_date, end_date, outputsize="compact"
+    ):
         all_data = {}
         for ticker in tickers:
-            url = f"https://www.alphavantage.co/query?function=TIME_SERIES_DAILY_ADJUSTED&symbol={ticker}&apikey={self.api_key}&entitlement=delayed"
+            url = f"https://www.alphavantage.co/query?function=TIME_SERIES_DAILY_ADJUSTED&symbol={ticker}&outputsize={outputsize}&apikey={self.api_key}&entitlement=delayed"
             response = requests.get(url)
             data = response.json()
             if "Time Series (Daily)" in data:
@@ -49,9 +51,9 @@ class AlphaVantageClient:
             return None
 
     def get_fx_daily_alphavantage(
-        self, from_symbol, to_symbol, start_date, end_date
+        self, from_symbol, to_symbol, start_date, end_date, outputsize="compact"
     ):
-        url = f"https://www.alphavantage.co/query?function=FX_DAILY&from_symbol={from_symbol}&to_symbol={to_symbol}&apikey={self.api_key}&entitlement=delayed"
+        url = f"https://www.alphavantage.co/query?function=FX_DAILY&outputsize={outputsize}&from_symbol={from_symbol}&to_symbol={to_symbol}&apikey={self.api_key}&entitlement=delayed"
         response = requests.get(url)
         data = response.json()
         if "Time Series FX (Daily)" in data:
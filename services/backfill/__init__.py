@@ -0,0 +1,5 @@
+from services.backfill.main import backfill
+
+__all__ = [
+    "backfill",
+]
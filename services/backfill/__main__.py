@@ -0,0 +1,12 @@
+from services.backfill.main import backfill, parse_args
+
+if __name__ == "__main__":
+    args = parse_args()
+    backfill(
+        fund_id=args.fund_id,
+        start_date=args.start,
+        end_date=args.end,
+        output_dir=args.output_dir,
+        cache_dir=args.cache_dir,
+        workers=args.workers,
+    )
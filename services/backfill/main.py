@@ -0,0 +1,269 @@
+from clients.alphavantage import alphavantage_client
+from clients.investments import investments_client
+from services.performance_attribution.main import build_attribution_df
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timedelta
+import pandas as pd
+import pandas_market_calendars as mcal
+import argparse
+import os
+
+_CALENDAR = "XMEX"
+_ASSET_PRICES_FILE = "asset_daily_prices.parquet"
+_USDMXN_PRICES_FILE = "usdmxn_daily_prices.parquet"
+_PARTITION_FILE = "attribution.parquet"
+
+# Filled in each worker process by _init_worker
+_asset_prices = None
+_usdmxn_prices = None
+_portfolio_df = None
+
+
+def calculate_session_pairs(start_date, end_date):
+    """(previous session, session) pairs for every XMEX session in the range.
+
+    Only closed sessions are returned, today's and future ones are left out.
+    """
+    today = pd.Timestamp(datetime.now().date())
+    schedule = mcal.get_calendar(_CALENDAR).schedule(
+        start_date=pd.Timestamp(start_date) - timedelta(days=10),
+        end_date=end_date,
+    )
+    sessions = schedule.index
+    return [
+        (sessions[i - 1], sessions[i])
+        for i in range(1, len(sessions))
+        if pd.Timestamp(start_date) <= sessions[i] < today
+    ]
+
+
+def _columns_to_fetch(prices, columns, start_date, end_date):
+    """Every column when the cached dates fall short, else the missing ones."""
+    if (
+        prices is None
+        or prices.index.min() > start_date
+        or prices.index.max() < end_date
+    ):
+        return list(columns)
+    return [column for column in columns if column not in prices.columns]
+
+
+def load_price_cache(cache_dir, tickers, start_date, end_date):
+    """Make sure the local cache covers the range, fetching only when it doesn't.
+
+    Returns the paths of the asset and USDMXN daily price files. Raises when a
+    ticker is still missing after fetching (AlphaVantage drops single tickers
+    when rate limited). What was fetched is kept, so the next run only asks
+    for the missing tickers.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    asset_path = os.path.join(cache_dir, _ASSET_PRICES_FILE)
+    usdmxn_path = os.path.join(cache_dir, _USDMXN_PRICES_FILE)
+    # Today's session is not closed yet, so the cache only needs to reach
+    # yesterday
+    end_date = min(end_date, pd.Timestamp(datetime.now().date()) - timedelta(1))
+
+    asset_prices = (
+        pd.read_parquet(asset_path) if os.path.exists(asset_path) else None
+    )
+    tickers_to_fetch = _columns_to_fetch(
+        asset_prices, tickers, start_date, end_date
+    )
+    if tickers_to_fetch:
+        fetched = alphavantage_client.get_price_timeseries_alphavantage(
+            tickers=tickers_to_fetch,
+            start_date=start_date,
+            end_date=pd.Timestamp.max,
+            outputsize="full",
+        )
+        if fetched is not None:
+            if asset_prices is not None:
+                fetched = fetched.combine_first(asset_prices)
+            fetched.to_parquet(asset_path)
+            asset_prices = fetched
+
+        missing = set(tickers) - set(
+            asset_prices.columns if asset_prices is not None else []
+        )
+        if missing:
+            raise RuntimeError(
+                f"Could not fetch daily prices for {sorted(missing)}"
+            )
+
+    usdmxn_prices = (
+        pd.read_parquet(usdmxn_path) if os.path.exists(usdmxn_path) else None
+    )
+    if _columns_to_fetch(usdmxn_prices, ["Close"], start_date, end_date):
+        fetched = alphavantage_client.get_fx_daily_alphavantage(
+            from_symbol="USD",
+            to_symbol="MXN",
+            start_date=start_date,
+            end_date=pd.Timestamp.max,
+            outputsize="full",
+        )
+        if fetched is None:
+            raise RuntimeError("Could not fetch daily USDMXN prices")
+        if usdmxn_prices is not None:
+            fetched = fetched.combine_first(usdmxn_prices)
+        fetched.to_parquet(usdmxn_path)
+
+    return asset_path, usdmxn_path
+
+
+def _init_worker(asset_path, usdmxn_path, portfolio_df):
+    global _asset_prices, _usdmxn_prices, _portfolio_df
+    _asset_prices = pd.read_parquet(asset_path).sort_index().ffill()
+    _usdmxn_prices = pd.read_parquet(usdmxn_path)["Close"].sort_index().ffill()
+    _portfolio_df = portfolio_df
+
+
+def _last_row_on_or_before(prices, date):
+    position = prices.index.searchsorted(date, side="right") - 1
+    if position < 0:
+        return None
+    return prices.iloc[position]
+
+
+def calculate_session_attribution(previous_session, session):
+    """Attribution for one session, or None when prices are not available.
+
+    Sessions after the last cached date, or with a portfolio ticker lacking
+    a start or end price, return None. Storing them would carry the last
+    close forward as a 0% return or leave the ticker out of the fund total,
+    and they would never be recomputed.
+    """
+    if (
+        _asset_prices.index.max() < session
+        or _usdmxn_prices.index.max() < session
+    ):
+        return None
+
+    asset_prices_start = _last_row_on_or_before(_asset_prices, previous_session)
+    asset_prices_end = _last_row_on_or_before(_asset_prices, session)
+    usdmxn_start = _last_row_on_or_before(_usdmxn_prices, previous_session)
+    usdmxn_end = _last_row_on_or_before(_usdmxn_prices, session)
+    if asset_prices_start is None or usdmxn_start is None:
+        return None
+    tickers = _portfolio_df.index
+    if (
+        asset_prices_start.reindex(tickers).isna().any()
+        or asset_prices_end.reindex(tickers).isna().any()
+    ):
+        return None
+
+    attribution_df = build_attribution_df(
+        portfolio_df=_portfolio_df,
+        asset_daily_prices=pd.DataFrame([asset_prices_start, asset_prices_end]),
+        usdmxn_start=usdmxn_start,
+        usdmxn_end=usdmxn_end,
+    )
+    attribution_df = attribution_df.reset_index()
+    attribution_df.insert(0, "date", session)
+    attribution_df["usdmxn_start"] = usdmxn_start
+    attribution_df["usdmxn_end"] = usdmxn_end
+    return attribution_df
+
+
+def backfill_month(partition_dir, session_pairs):
+    """Compute the sessions missing from a month partition and rewrite it.
+
+    Returns the number of sessions computed.
+    """
+    partition_path = os.path.join(partition_dir, _PARTITION_FILE)
+    existing = (
+        pd.read_parquet(partition_path)
+        if os.path.exists(partition_path)
+        else None
+    )
+    computed_dates = set(existing["date"]) if existing is not None else set()
+
+    new_frames = []
+    for previous_session, session in session_pairs:
+        if session in computed_dates:
+            continue
+        attribution_df = calculate_session_attribution(
+            previous_session, session
+        )
+        if attribution_df is not None:
+            new_frames.append(attribution_df)
+
+    if not new_frames:
+        return 0
+
+    frames = new_frames if existing is None else [existing] + new_frames
+    month_df = (
+        pd.concat(frames, ignore_index=True)
+        .sort_values(["date", "ticker"])
+        .reset_index(drop=True)
+    )
+
+    # Write to a temporary file first so an interrupted run never leaves a
+    # half written partition behind
+    os.makedirs(partition_dir, exist_ok=True)
+    tmp_path = partition_path + ".tmp"
+    month_df.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, partition_path)
+    return len(new_frames)
+
+
+def backfill(fund_id, start_date, end_date, output_dir, cache_dir, workers):
+    """Daily attribution for every XMEX session in the range.
+
+    The investments API only exposes the current portfolio, so today's
+    weights are applied to every session.
+    """
+    start_date = pd.Timestamp(start_date)
+    end_date = pd.Timestamp(end_date)
+    portfolio_df = investments_client.get_portfolio(fund_id=fund_id)
+    if portfolio_df is None:
+        raise RuntimeError(f"Could not fetch portfolio for fund ID {fund_id}")
+    portfolio_df = portfolio_df.astype({"weight": float})
+
+    session_pairs = calculate_session_pairs(start_date, end_date)
+    if not session_pairs:
+        print("No XMEX sessions in the given date range")
+        return
+
+    asset_path, usdmxn_path = load_price_cache(
+        cache_dir,
+        tickers=portfolio_df.index,
+        start_date=session_pairs[0][0],
+        end_date=session_pairs[-1][1],
+    )
+
+    months = {}
+    for previous_session, session in session_pairs:
+        months.setdefault(session.strftime("%Y-%m"), []).append(
+            (previous_session, session)
+        )
+
+    fund_dir = os.path.join(output_dir, f"fund_id={fund_id}")
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(asset_path, usdmxn_path, portfolio_df),
+    ) as executor:
+        futures = {
+            executor.submit(
+                backfill_month,
+                os.path.join(fund_dir, f"month={month}"),
+                month_session_pairs,
+            ): month
+            for month, month_session_pairs in months.items()
+        }
+        for future in as_completed(futures):
+            print(f"{futures[future]}: {future.result()} sessions computed")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        prog="python -m services.backfill",
+        description="Backfill daily performance attribution for XMEX sessions."
+    )
+    parser.add_argument("--fund-id", type=int, default=6)
+    parser.add_argument("--start", required=True, help="YYYY-MM-DD")
+    parser.add_argument("--end", required=True, help="YYYY-MM-DD")
+    parser.add_argument("--output-dir", default="data/attribution")
+    parser.add_argument("--cache-dir", default="data/prices")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    return parser.parse_args()
@@ -0,0 +1,5 @@
+from services.look_through.main import LookThrough
+
+__all__ = [
+    "LookThrough",
+]
@@ -0,0 +1,126 @@
+from scipy import sparse
+import numpy as np
+import pandas as pd
+import os
+
+_UNKNOWN = "Unknown"
+_HOLDINGS_COLUMNS = ["ticker", "name", "sector", "country", "weight"]
+
+
+class LookThrough:
+    """Look-through from ETF positions to their underlying securities.
+
+    Constituents are read from `<holdings_dir>/<ETF ticker>.csv` files with
+    the columns ticker, name, sector, country and weight. They are stored as
+    a sparse ETF x security matrix whose rows are normalized to sum to 1, so
+    exposures and contributions always add up to the ETF-level totals. ETFs
+    without a constituent file are kept as a single security of their own
+    with an unknown sector and country. Holdings without a ticker (cash,
+    futures, FX forwards) get an "<ETF>:<name>" id so they stay in the
+    matrix as securities of their own.
+    """
+
+    def __init__(self, holdings_dir, etfs):
+        self.etfs = pd.Index(etfs)
+
+        frames = []
+        for etf in self.etfs:
+            path = os.path.join(holdings_dir, f"{etf}.csv")
+            if os.path.exists(path):
+                holdings = pd.read_csv(path, usecols=_HOLDINGS_COLUMNS)
+            else:
+                print(f"No constituent file for {etf}, using it as a security")
+                holdings = pd.DataFrame(
+                    [[etf, etf, _UNKNOWN, _UNKNOWN, 1.0]],
+                    columns=_HOLDINGS_COLUMNS,
+                )
+            holdings["etf"] = etf
+            holdings["ticker"] = _fill_missing_tickers(holdings, etf)
+            frames.append(holdings)
+        holdings = pd.concat(frames, ignore_index=True)
+        holdings[["sector", "country"]] = holdings[["sector", "country"]].fillna(
+            _UNKNOWN
+        )
+
+        etf_codes = self.etfs.get_indexer(holdings["etf"])
+        security_codes, securities = pd.factorize(holdings["ticker"])
+        self.securities = (
+            holdings.drop_duplicates("ticker")
+            .set_index("ticker")
+            .loc[securities, ["name", "sector", "country"]]
+        )
+
+        weights = holdings["weight"].to_numpy(dtype=float)
+        self.holdings = _normalize_rows(
+            sparse.csr_matrix(
+                (weights, (etf_codes, security_codes)),
+                shape=(len(self.etfs), len(securities)),
+            )
+        )
+
+        self.sectors, self.etf_sectors = self._group_by("sector")
+        self.countries, self.etf_countries = self._group_by("country")
+
+    def _group_by(self, column):
+        """Labels and ETF x label matrix aggregating securities by `column`."""
+        codes, labels = pd.factorize(self.securities[column])
+        security_labels = sparse.csr_matrix(
+            (np.ones(len(codes)), (np.arange(len(codes)), codes)),
+            shape=(len(codes), len(labels)),
+        )
+        etf_labels = (self.holdings @ security_labels).tocsr()
+        return pd.Index(labels, name=column), etf_labels
+
+    def _etf_vector(self, etf_values):
+        return (
+            etf_values.astype(float)
+            .reindex(self.etfs)
+            .fillna(0.0)
+            .to_numpy(dtype=float)
+        )
+
+    def security_exposures(self, etf_weights):
+        """Portfolio weight in each underlying security."""
+        return pd.Series(
+            self.holdings.T @ self._etf_vector(etf_weights),
+            index=self.securities.index,
+        )
+
+    def sector_exposures(self, etf_weights):
+        return pd.Series(
+            self.etf_sectors.T @ self._etf_vector(etf_weights),
+            index=self.sectors,
+        )
+
+    def country_exposures(self, etf_weights):
+        return pd.Series(
+            self.etf_countries.T @ self._etf_vector(etf_weights),
+            index=self.countries,
+        )
+
+    def sector_contributions(self, etf_contributions):
+        """Split each ETF contribution (e.g. `ctr_mxn`) across its sectors.
+
+        Only ETF-level returns are available, so every constituent is assumed
+        to have earned its ETF's return.
+        """
+        return self.sector_exposures(etf_contributions)
+
+    def country_contributions(self, etf_contributions):
+        return self.country_exposures(etf_contributions)
+
+
+def _fill_missing_tickers(holdings, etf):
+    tickers = holdings["ticker"].astype("string").str.strip()
+    names = holdings["name"].astype("string").str.strip()
+    missing = tickers.isna() | (tickers == "")
+    synthetic = (
+        etf + ":" + names.where(names.notna() & (names != ""), _UNKNOWN)
+    )
+    return tickers.where(~missing, synthetic).astype(object)
+
+
+def _normalize_rows(matrix):
+    row_sums = np.asarray(matrix.sum(axis=1)).ravel()
+    row_sums[row_sums == 0] = 1.0
+    return (sparse.diags(1 / row_sums) @ matrix).tocsr()
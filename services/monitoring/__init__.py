@@ -0,0 +1,15 @@
+from services.monitoring.main import (
+    FileAlertSink,
+    Monitor,
+    StdoutAlertSink,
+    ThresholdRule,
+    WebhookAlertSink,
+)
+
+__all__ = [
+    "FileAlertSink",
+    "Monitor",
+    "StdoutAlertSink",
+    "ThresholdRule",
+    "WebhookAlertSink",
+]
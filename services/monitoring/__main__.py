@@ -0,0 +1,8 @@
+from services.monitoring.main import build_monitor
+from settings import MonitoringSettings, SnapshotSettings
+
+if __name__ == "__main__":
+    build_monitor(
+        MonitoringSettings.load_from_env_vars(),
+        SnapshotSettings.load_from_env_vars(),
+    ).run()
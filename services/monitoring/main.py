@@ -0,0 +1,215 @@
+from services.performance_attribution import (
+    PerformanceAttribution,
+    save_snapshot,
+)
+from datetime import datetime, timedelta, timezone
+import pandas_market_calendars as mcal
+import requests
+import json
+import time
+
+_CALENDARS = ["XMEX", "NYSE"]
+_CLOSED_MARKET_RECHECK_SECONDS = 6 * 60 * 60
+
+
+class ThresholdRule:
+    """Fires for every value of `metric` whose absolute value reaches `threshold`.
+
+    `metric` receives a `PerformanceAttribution` and returns a dict mapping a
+    key (e.g. "portfolio" or a ticker) to the value to check.
+    """
+
+    def __init__(self, name, threshold, metric):
+        self.name = name
+        self.threshold = threshold
+        self.metric = metric
+
+    def evaluate(self, perf_attr):
+        return {
+            key: value
+            for key, value in self.metric(perf_attr).items()
+            if abs(value) >= self.threshold
+        }
+
+
+def total_return_rule(threshold):
+    return ThresholdRule(
+        "total_return_mxn",
+        threshold,
+        lambda perf_attr: {"portfolio": perf_attr.total_return_mxn},
+    )
+
+
+def fx_effect_rule(threshold):
+    return ThresholdRule(
+        "total_fx_effect",
+        threshold,
+        lambda perf_attr: {"portfolio": perf_attr.total_fx_effect},
+    )
+
+
+def ticker_contribution_rule(threshold):
+    return ThresholdRule(
+        "ctr_mxn",
+        threshold,
+        lambda perf_attr: perf_attr.attribution_df["ctr_mxn"]
+        .dropna()
+        .to_dict(),
+    )
+
+
+class StdoutAlertSink:
+    def send(self, alert):
+        print(
+            f"[{alert['timestamp']}] ALERT {alert['rule']} {alert['key']}: "
+            f"{alert['value']*100:+.2f}% (threshold ±{alert['threshold']*100:.2f}%)"
+        )
+
+
+class FileAlertSink:
+    def __init__(self, path):
+        self.path = path
+
+    def send(self, alert):
+        with open(self.path, "a") as alert_file:
+            alert_file.write(json.dumps(alert) + "\n")
+
+
+class WebhookAlertSink:
+    def __init__(self, url):
+        self.url = url
+
+    def send(self, alert):
+        if self.url is None:
+            print(f"Webhook URL not configured, dropping alert: {alert}")
+            return
+        response = requests.post(self.url, json=alert, timeout=10)
+        if response.status_code >= 400:
+            print(
+                f"Failed to deliver alert to webhook. Status code: {response.status_code}"
+            )
+
+
+def seconds_until_market_open(now):
+    """Seconds until XMEX or NYSE is next open, 0 if either is open at `now`."""
+    next_open = None
+    for calendar_name in _CALENDARS:
+        schedule = mcal.get_calendar(calendar_name).schedule(
+            start_date=(now - timedelta(days=1)).strftime("%Y-%m-%d"),
+            end_date=(now + timedelta(days=10)).strftime("%Y-%m-%d"),
+        )
+        schedule = schedule[schedule["market_close"] > now]
+        if schedule.empty:
+            continue
+        market_open = schedule["market_open"].iloc[0]
+        if market_open <= now:
+            return 0
+        if next_open is None or market_open < next_open:
+            next_open = market_open
+
+    if next_open is None:
+        return _CLOSED_MARKET_RECHECK_SECONDS
+    return (next_open - now).total_seconds()
+
+
+class Monitor:
+    """Refreshes the attribution while markets are open and sends alerts.
+
+    An alert is sent when a rule starts breaching for a key; it is not repeated
+    on every refresh until the value goes back inside the threshold.
+    """
+
+    def __init__(
+        self, rules, sink, interval_seconds, snapshot_dir=None, snapshot_keep=5
+    ):
+        self.rules = rules
+        self.sink = sink
+        self.interval_seconds = interval_seconds
+        self.snapshot_dir = snapshot_dir
+        self.snapshot_keep = snapshot_keep
+        self.performance_attribution = None
+        self._active_breaches = set()
+
+    def refresh(self):
+        if self.performance_attribution is None:
+            self.performance_attribution = PerformanceAttribution()
+        else:
+            self.performance_attribution.refresh()
+
+    def save_snapshot(self):
+        if self.snapshot_dir is None:
+            return
+        try:
+            save_snapshot(
+                self.performance_attribution,
+                self.snapshot_dir,
+                keep=self.snapshot_keep,
+            )
+        except Exception as e:
+            print(f"Failed to save attribution snapshot: {e}")
+
+    def check(self):
+        breaches = {}
+        for rule in self.rules:
+            for key, value in rule.evaluate(
+                self.performance_attribution
+            ).items():
+                breaches[(rule.name, key)] = (rule, value)
+
+        timestamp = datetime.now(timezone.utc).isoformat()
+        for (rule_name, key), (rule, value) in breaches.items():
+            if (rule_name, key) in self._active_breaches:
+                continue
+            self.sink.send(
+                {
+                    "timestamp": timestamp,
+                    "rule": rule_name,
+                    "key": key,
+                    "value": float(value),
+                    "threshold": rule.threshold,
+                }
+            )
+        self._active_breaches = set(breaches)
+
+    def run(self):
+        while True:
+            wait = seconds_until_market_open(datetime.now(timezone.utc))
+            if wait > 0:
+                print(f"Markets closed, sleeping {wait:.0f} seconds")
+                time.sleep(wait)
+                continue
+
+            try:
+                self.refresh()
+                self.check()
+                self.save_snapshot()
+            except Exception as e:
+                print(f"Monitoring refresh failed: {e}")
+
+            time.sleep(self.interval_seconds)
+
+
+def build_alert_sink(settings):
+    if settings.monitor_alert_sink == "file":
+        return FileAlertSink(settings.monitor_alert_file)
+    if settings.monitor_alert_sink == "webhook":
+        url = settings.monitor_webhook_url
+        return WebhookAlertSink(url.get_secret_value() if url else None)
+    return StdoutAlertSink()
+
+
+def build_monitor(settings, snapshot_settings):
+    rules = [
+        total_return_rule(settings.monitor_total_return_threshold),
+        fx_effect_rule(settings.monitor_fx_effect_threshold),
+        ticker_contribution_rule(
+            settings.monitor_ticker_contribution_threshold
+        ),
+    ]
+    return Monitor(
+        rules=rules,
+        sink=build_alert_sink(settings),
+        interval_seconds=settings.monitor_interval_seconds,
+        snapshot_dir=snapshot_settings.snapshot_dir,
+        snapshot_keep=snapshot_settings.snapshot_keep,
+    )
@@ -1,5 +1,13 @@
 from services.performance_attribution.main import PerformanceAttribution
+from services.performance_attribution.snapshot import (
+    AttributionStore,
+    load_latest_snapshot,
+    save_snapshot,
+)
 
 __all__ = [
+    "AttributionStore",
     "PerformanceAttribution",
+    "load_latest_snapshot",
+    "save_snapshot",
 ]
@@ -1,7 +1,9 @@
 from clients.alphavantage import alphavantage_client
 from clients.investments import investments_client
 from clients.yahoofinance import yahoo_finance_client
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+import numpy as np
+import pandas as pd
 import pandas_market_calendars as mcal
 import requests
 import json
@@ -14,38 +16,69 @@ _CALENDAR = "XMEX"
 
 class PerformanceAttribution:
     def __init__(self):
-        self.start_date, self.end_date = (
+        self.start_date = None
+        self.portfolio_df = None
+        self.asset_prices_start = None
+        self.provider_timestamps = {}
+        self.refresh()
+
+    @classmethod
+    def from_snapshot(cls, snapshot):
+        """Rebuild an instance from the fields saved by `save_snapshot`."""
+        perf_attr = cls.__new__(cls)
+        perf_attr.asset_prices_start = None
+        for field, value in snapshot.items():
+            setattr(perf_attr, field, value)
+        return perf_attr
+
+    def refresh(self):
+        """Fetch fresh market data and recompute the attribution.
+
+        The portfolio, the previous session closes and the starting USDMXN
+        only change when the date range rolls over to a new session, so they
+        are fetched once per session and kept. The end prices and the ending
+        USDMXN always come from the last intraday quotes (Yahoo Finance and
+        AlphaVantage FX intraday), on the first refresh too, so totals never
+        jump just because the source changed. A refresh within a session
+        costs just the two intraday calls.
+        """
+        start_date, end_date = (
             self.calculate_performance_attribution_date_range()
         )
-        self.portfolio_df = investments_client.get_portfolio(fund_id=_FUND_ID)
+        if self.portfolio_df is None or start_date != self.start_date:
+            self.portfolio_df = investments_client.get_portfolio(
+                fund_id=_FUND_ID
+            )
+            self.provider_timestamps["investments"] = _utcnow()
+            self.asset_prices_start = None
+        self.start_date, self.end_date = start_date, end_date
         tickers = self.portfolio_df.index
 
+        if self.asset_prices_start is None:
+            self.fetch_start_prices(tickers)
+
         self.intraday_asset_prices = (
             yahoo_finance_client.get_intraday_stock_data_yahoo(symbols=tickers)
         )
+        self.provider_timestamps["yahoofinance_intraday"] = _utcnow()
         self.usdmxn_intraday_prices = (
             alphavantage_client.get_fx_intraday_alphavantage(
                 from_symbol="USD", to_symbol="MXN"
             )
         )
-        self.asset_daily_prices = (
-            alphavantage_client.get_price_timeseries_alphavantage(
-                tickers=tickers,
-                start_date=self.start_date,
-                end_date=self.end_date,
-            )
-        )
-
-        self.usdmxn_end, self.usdmxn_start = fetch_mxn_pip(self.end_date)
+        self.provider_timestamps["alphavantage_fx_intraday"] = _utcnow()
 
-        if self.usdmxn_end is None:
-            usdmxn_daily_prices = alphavantage_client.get_fx_daily_alphavantage(
-                from_symbol="USD",
-                to_symbol="MXN",
-                start_date=self.start_date,
-                end_date=self.end_date,
-            )
-            self.usdmxn_end = usdmxn_daily_prices.iloc[-1]["Close"]
+        asset_prices_end = (
+            self.intraday_asset_prices.ffill()
+            .iloc[-1]
+            .reindex(self.asset_prices_start.index)
+        )
+        self.asset_daily_prices = pd.DataFrame(
+            [self.asset_prices_start, asset_prices_end],
+            index=pd.to_datetime([self.start_date, self.end_date]),
+        )
+        usdmxn_intraday_prices = self.usdmxn_intraday_prices.sort_index()
+        self.usdmxn_end = usdmxn_intraday_prices["Close"].iloc[-1]
 
         print("USDMXN Start: ", self.usdmxn_start)
         print("USDMXN End: ", self.usdmxn_end)
@@ -60,6 +93,23 @@ class PerformanceAttribution:
         self.total_equity_effect = self.total_return_usd
         self.total_fx_effect = self.total_return_mxn - self.total_equity_effect
 
+    def fetch_start_prices(self, tickers):
+        """Fetch the previous session closes and the starting USDMXN."""
+        asset_daily_prices = (
+            alphavantage_client.get_price_timeseries_alphavantage(
+                tickers=tickers,
+                start_date=self.start_date,
+                end_date=self.end_date,
+            )
+        )
+        self.provider_timestamps["alphavantage_daily"] = _utcnow()
+        self.asset_prices_start = asset_daily_prices.iloc[0]
+
+        # PIP's second value is the previous session's USDMXN whether or not
+        # today's has been published yet
+        _, self.usdmxn_start = fetch_mxn_pip(self.end_date)
+        self.provider_timestamps["pip"] = _utcnow()
+
     def calculate_intraday_performance_attribution_serie(self):
         usdmxn_start = self.usdmxn_start
         usdmxn_end = self.usdmxn_end
@@ -109,6 +159,9 @@ class PerformanceAttribution:
             columns=w.index
         )
 
+        # Keep the per-ticker return matrix for what-if simulations
+        self.intraday_asset_returns_mxn = aligned_returns
+
         # Calculate portfolio returns (transpose aligned_returns)
         intraday_portfolio_returns = aligned_returns.mul(w).sum(axis=1)
         intraday_portfolio_returns = (
@@ -129,28 +182,89 @@ class PerformanceAttribution:
         return start_date, end_date
 
     def calculate_performance_attribution(self):
-        attribution_df = self.asset_daily_prices.T
-        attribution_df = attribution_df.iloc[:, [0, -1]]
-        attribution_df.columns = ["start_price", "end_price"]
-        attribution_df["return_usd"] = (
-            attribution_df["end_price"] / attribution_df["start_price"] - 1
+        return build_attribution_df(
+            portfolio_df=self.portfolio_df,
+            asset_daily_prices=self.asset_daily_prices,
+            usdmxn_start=self.usdmxn_start,
+            usdmxn_end=self.usdmxn_end,
         )
-        usd_return = self.usdmxn_end / self.usdmxn_start - 1
 
-        attribution_df["return_mxn"] = (1 + attribution_df["return_usd"]) * (
-            1 + usd_return
-        ) - 1
+    def simulate_rebalances(self, weights):
+        """Evaluate today's performance under many candidate weight vectors.
+
+        `weights` is a scenarios x tickers DataFrame (tickers missing from a
+        scenario count as zero weight). Returns a tuple of two DataFrames
+        indexed by scenario: the totals (`total_return_mxn`,
+        `total_equity_effect`, `total_fx_effect`) and the intraday cumulative
+        return path in percent, one column per timestamp.
+        """
+        tickers = self.attribution_df.index
+        w = weights.reindex(columns=tickers).fillna(0.0).to_numpy(dtype=float)
 
-        attribution_df = self.portfolio_df.join(attribution_df, how="outer")
-        attribution_df["ctr_mxn"] = (
-            attribution_df["return_mxn"] * attribution_df["weight"]
+        # tickers x [return_mxn, return_usd]
+        daily_returns = (
+            self.attribution_df[["return_mxn", "return_usd"]]
+            .fillna(0.0)
+            .to_numpy(dtype=float)
         )
-        attribution_df["ctr_usd"] = (
-            attribution_df["return_usd"] * attribution_df["weight"]
+        totals = w @ daily_returns
+
+        totals_df = pd.DataFrame(
+            {
+                "total_return_mxn": totals[:, 0],
+                "total_equity_effect": totals[:, 1],
+                "total_fx_effect": totals[:, 0] - totals[:, 1],
+            },
+            index=weights.index,
+        )
+
+        # timestamps x tickers
+        intraday_returns = (
+            self.intraday_asset_returns_mxn.reindex(columns=tickers)
+            .fillna(0.0)
+            .to_numpy(dtype=float)
         )
-        attribution_df.index.name = "ticker"
+        paths = np.cumprod(1 + w @ intraday_returns.T, axis=1) * 100 - 100
+
+        intraday_df = pd.DataFrame(
+            paths,
+            index=weights.index,
+            columns=self.intraday_asset_returns_mxn.index,
+        )
+
+        return totals_df, intraday_df
+
+
+def build_attribution_df(
+    portfolio_df, asset_daily_prices, usdmxn_start, usdmxn_end
+):
+    """Per-ticker attribution between the first and last rows of the prices."""
+    attribution_df = asset_daily_prices.T
+    attribution_df = attribution_df.iloc[:, [0, -1]]
+    attribution_df.columns = ["start_price", "end_price"]
+    attribution_df["return_usd"] = (
+        attribution_df["end_price"] / attribution_df["start_price"] - 1
+    )
+    usd_return = usdmxn_end / usdmxn_start - 1
+
+    attribution_df["return_mxn"] = (1 + attribution_df["return_usd"]) * (
+        1 + usd_return
+    ) - 1
+
+    attribution_df = portfolio_df.join(attribution_df, how="outer")
+    attribution_df["ctr_mxn"] = (
+        attribution_df["return_mxn"] * attribution_df["weight"]
+    )
+    attribution_df["ctr_usd"] = (
+        attribution_df["return_usd"] * attribution_df["weight"]
+    )
+    attribution_df.index.name = "ticker"
+
+    return attribution_df
+
 
-        return attribution_df
+def _utcnow():
+    return datetime.now(timezone.utc)
 
 
 def extract_date(string):
@@ -0,0 +1,164 @@
+from services.performance_attribution.main import PerformanceAttribution
+from datetime import datetime, timezone
+import threading
+import pickle
+import gzip
+import os
+
+_SNAPSHOT_VERSION = 1
+_SNAPSHOT_PREFIX = "snapshot-"
+_SNAPSHOT_SUFFIX = ".pkl.gz"
+_SNAPSHOT_FIELDS = [
+    "start_date",
+    "end_date",
+    "portfolio_df",
+    "attribution_df",
+    "total_return_mxn",
+    "total_return_usd",
+    "total_equity_effect",
+    "total_fx_effect",
+    "intraday_portfolio_returns",
+    "intraday_asset_returns_mxn",
+    "usdmxn_start",
+    "usdmxn_end",
+    "provider_timestamps",
+]
+
+
+def save_snapshot(perf_attr, directory, keep=5):
+    """Write the computed attribution to `directory` and prune old snapshots."""
+    os.makedirs(directory, exist_ok=True)
+    created_at = datetime.now(timezone.utc)
+    payload = {
+        "version": _SNAPSHOT_VERSION,
+        "created_at": created_at,
+        "fields": {
+            field: getattr(perf_attr, field) for field in _SNAPSHOT_FIELDS
+        },
+    }
+
+    filename = (
+        _SNAPSHOT_PREFIX
+        + created_at.strftime("%Y%m%dT%H%M%S%f")
+        + _SNAPSHOT_SUFFIX
+    )
+    path = os.path.join(directory, filename)
+    # Write to a temporary file first so readers never see a partial snapshot
+    tmp_path = path + ".tmp"
+    with gzip.open(tmp_path, "wb") as snapshot_file:
+        pickle.dump(payload, snapshot_file, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+    for old_path in _list_snapshots(directory)[keep:]:
+        try:
+            os.remove(old_path)
+        except FileNotFoundError:
+            # Another process sharing the directory pruned it first
+            pass
+
+    return path
+
+
+def _list_snapshots(directory):
+    """Snapshot paths, newest first."""
+    if not os.path.isdir(directory):
+        return []
+    filenames = sorted(
+        (
+            filename
+            for filename in os.listdir(directory)
+            if filename.startswith(_SNAPSHOT_PREFIX)
+            and filename.endswith(_SNAPSHOT_SUFFIX)
+        ),
+        reverse=True,
+    )
+    return [os.path.join(directory, filename) for filename in filenames]
+
+
+def load_latest_snapshot(directory):
+    """Return (PerformanceAttribution, created_at) for the newest valid snapshot.
+
+    Snapshots that can't be read or were written by another snapshot version
+    are skipped. Returns (None, None) when there is no valid snapshot.
+    """
+    for path in _list_snapshots(directory):
+        try:
+            with gzip.open(path, "rb") as snapshot_file:
+                payload = pickle.load(snapshot_file)
+        except Exception as e:
+            print(f"Skipping unreadable snapshot {path}: {e}")
+            continue
+
+        if payload.get("version") != _SNAPSHOT_VERSION or not set(
+            _SNAPSHOT_FIELDS
+        ).issubset(payload.get("fields", {})):
+            print(f"Skipping incompatible snapshot {path}")
+            continue
+
+        return (
+            PerformanceAttribution.from_snapshot(payload["fields"]),
+            payload["created_at"],
+        )
+
+    return None, None
+
+
+class AttributionStore:
+    """Serves the latest attribution, refreshing it in the background.
+
+    On startup the newest snapshot on disk is served right away. Only when no
+    snapshot exists is the attribution built before returning. `get` starts a
+    background refresh once the served attribution is older than
+    `max_age_seconds`, so a replica starting right after another one (or the
+    monitoring worker) wrote a snapshot makes no provider calls.
+    """
+
+    def __init__(self, directory, keep=5, max_age_seconds=300):
+        self.directory = directory
+        self.keep = keep
+        self.max_age_seconds = max_age_seconds
+        self._lock = threading.Lock()
+        self._refreshing = False
+
+        self.performance_attribution, self.refreshed_at = (
+            load_latest_snapshot(directory)
+        )
+        if self.performance_attribution is None:
+            self._refresh()
+
+    def get(self):
+        if self.is_stale():
+            self.refresh_in_background()
+        return self.performance_attribution
+
+    def is_stale(self):
+        age = datetime.now(timezone.utc) - self.refreshed_at
+        return age.total_seconds() > self.max_age_seconds
+
+    def refresh_in_background(self):
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        threading.Thread(target=self._refresh_safely, daemon=True).start()
+
+    def _refresh_safely(self):
+        try:
+            self._refresh()
+        except Exception as e:
+            print(f"Background attribution refresh failed: {e}")
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def _refresh(self):
+        # Build a new instance instead of refreshing in place so sessions
+        # rendering the current one never see half updated fields
+        perf_attr = PerformanceAttribution()
+        self.performance_attribution = perf_attr
+        self.refreshed_at = datetime.now(timezone.utc)
+        # Saving is best effort, failing to persist must not undo the refresh
+        try:
+            save_snapshot(perf_attr, self.directory, keep=self.keep)
+        except Exception as e:
+            print(f"Failed to save attribution snapshot: {e}")
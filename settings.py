@@ -1,6 +1,6 @@
 from pydantic import SecretStr
 from pydantic_settings import BaseSettings
-from typing import TypeVar
+from typing import Optional, TypeVar
 
 Self = TypeVar("Self", bound="__BaseSettings")
 
@@ -17,3 +17,19 @@ class AlphaVantageClientSettings(__BaseSettings):
 
 class InvestmentsAPISettings(__BaseSettings):
     investments_api_url: SecretStr
+
+
+class MonitoringSettings(__BaseSettings):
+    monitor_interval_seconds: int = 300
+    monitor_total_return_threshold: float = 0.02
+    monitor_fx_effect_threshold: float = 0.01
+    monitor_ticker_contribution_threshold: float = 0.005
+    monitor_alert_sink: str = "stdout"
+    monitor_alert_file: str = "alerts.log"
+    monitor_webhook_url: Optional[SecretStr] = None
+
+
+class SnapshotSettings(__BaseSettings):
+    snapshot_dir: str = "data/snapshots"
+    snapshot_keep: int = 5
+    snapshot_max_age_seconds: int = 300
@@ -1,6 +1,7 @@
 import streamlit as st
 import base64
-from services.performance_attribution.main import PerformanceAttribution
+from services.performance_attribution.snapshot import AttributionStore
+from settings import SnapshotSettings
 import plotly.graph_objects as go
 
 
@@ -9,6 +10,17 @@ def get_image_as_base64(image_path):
         return base64.b64encode(image_file.read()).decode()
 
 
+@st.cache_resource
+def get_attribution_store():
+    """Shared across sessions so a restart serves the last snapshot at once"""
+    settings = SnapshotSettings.load_from_env_vars()
+    return AttributionStore(
+        directory=settings.snapshot_dir,
+        keep=settings.snapshot_keep,
+        max_age_seconds=settings.snapshot_max_age_seconds,
+    )
+
+
 def setup_page():
     """Configure page settings and header"""
     st.set_page_config(
@@ -282,7 +294,7 @@ if __name__ == "__main__":
     with st.spinner(
         "Cargando datos..."
     ):  # Add loading spinner with Spanish text
-        performance_attribution = PerformanceAttribution()
+        performance_attribution = get_attribution_store().get()
 
     display_total_return(performance_attribution)
     display_intraday_returns_chart(performance_attribution)
@@ -0,0 +1,5 @@
+import os
+
+# The clients read their settings when imported
+os.environ.setdefault("ALPHAVANTAGE_API_KEY", "test")
+os.environ.setdefault("INVESTMENTS_API_URL", "http://localhost/")
@@ -0,0 +1,113 @@
+from datetime import datetime, timedelta
+from services.backfill import main as backfill
+import pandas as pd
+import pytest
+import os
+
+
+def _daily_prices(last_date, tickers=("AAA", "BBB")):
+    dates = pd.bdate_range("2024-02-01", last_date)
+    return pd.DataFrame(
+        {"AAA": range(100, 100 + len(dates)), "BBB": 50.0}, index=dates
+    ).astype(float)[list(tickers)]
+
+
+def _init_cache(tmp_path, last_cached_date, cached_tickers=("AAA", "BBB")):
+    asset_prices = _daily_prices(last_cached_date, cached_tickers)
+    dates = asset_prices.index
+    usdmxn_prices = pd.DataFrame({"Close": 17.0}, index=dates)
+    asset_path = os.path.join(tmp_path, "assets.parquet")
+    usdmxn_path = os.path.join(tmp_path, "usdmxn.parquet")
+    asset_prices.to_parquet(asset_path)
+    usdmxn_prices.to_parquet(usdmxn_path)
+    portfolio_df = pd.DataFrame(
+        {"name": ["A", "B"], "weight": [0.6, 0.4]}, index=["AAA", "BBB"]
+    )
+    backfill._init_worker(asset_path, usdmxn_path, portfolio_df)
+
+
+def test_session_attribution_uses_cached_prices(tmp_path):
+    _init_cache(tmp_path, "2024-03-15")
+
+    attribution_df = backfill.calculate_session_attribution(
+        pd.Timestamp("2024-03-13"), pd.Timestamp("2024-03-14")
+    ).set_index("ticker")
+
+    assert attribution_df.loc["AAA", "return_usd"] > 0
+    assert attribution_df.loc["BBB", "return_usd"] == 0
+
+
+def test_sessions_after_cached_prices_are_not_written(tmp_path):
+    _init_cache(tmp_path, "2024-03-15")
+    partition_dir = os.path.join(tmp_path, "month=2024-04")
+    session_pairs = backfill.calculate_session_pairs("2024-04-01", "2024-04-12")
+
+    assert backfill.backfill_month(partition_dir, session_pairs) == 0
+    assert not os.path.exists(partition_dir)
+
+    # Once the prices are cached the same sessions get computed
+    _init_cache(tmp_path, "2024-04-30")
+    assert backfill.backfill_month(partition_dir, session_pairs) == len(
+        session_pairs
+    )
+    month_df = pd.read_parquet(
+        os.path.join(partition_dir, "attribution.parquet")
+    )
+    assert (month_df.loc[month_df["ticker"] == "AAA", "ctr_mxn"] > 0).all()
+
+
+def test_session_pairs_skip_today_and_future_sessions():
+    today = pd.Timestamp(datetime.now().date())
+
+    session_pairs = backfill.calculate_session_pairs(
+        today - timedelta(days=30), today + timedelta(days=30)
+    )
+
+    assert session_pairs
+    assert all(session < today for _, session in session_pairs)
+
+
+def test_sessions_with_missing_ticker_prices_are_not_written(tmp_path):
+    _init_cache(tmp_path, "2024-03-29", cached_tickers=["AAA"])
+    partition_dir = os.path.join(tmp_path, "month=2024-03")
+    session_pairs = backfill.calculate_session_pairs("2024-03-01", "2024-03-15")
+
+    assert backfill.backfill_month(partition_dir, session_pairs) == 0
+    assert not os.path.exists(partition_dir)
+
+
+def test_partial_fetch_raises_and_only_refetches_missing_tickers(
+    tmp_path, monkeypatch
+):
+    requested = []
+
+    def get_price_timeseries(tickers, start_date, end_date, outputsize):
+        requested.append(list(tickers))
+        # Simulate a rate limit dropping BBB on the first request
+        returned = ["AAA"] if len(requested) == 1 else tickers
+        return _daily_prices("2024-03-29", returned)
+
+    def get_fx_daily(from_symbol, to_symbol, start_date, end_date, outputsize):
+        return pd.DataFrame(
+            {"Close": 17.0}, index=pd.bdate_range("2024-02-01", "2024-03-29")
+        )
+
+    monkeypatch.setattr(
+        backfill.alphavantage_client,
+        "get_price_timeseries_alphavantage",
+        get_price_timeseries,
+    )
+    monkeypatch.setattr(
+        backfill.alphavantage_client, "get_fx_daily_alphavantage", get_fx_daily
+    )
+    start_date, end_date = pd.Timestamp("2024-03-01"), pd.Timestamp("2024-03-15")
+
+    with pytest.raises(RuntimeError, match="BBB"):
+        backfill.load_price_cache(tmp_path, ["AAA", "BBB"], start_date, end_date)
+
+    backfill.load_price_cache(tmp_path, ["AAA", "BBB"], start_date, end_date)
+    assert requested == [["AAA", "BBB"], ["BBB"]]
+
+    # Everything is cached now, so nothing else is fetched
+    backfill.load_price_cache(tmp_path, ["AAA", "BBB"], start_date, end_date)
+    assert len(requested) == 2
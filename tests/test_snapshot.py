@@ -0,0 +1,138 @@
+from datetime import datetime, timezone
+from services.performance_attribution import (
+    PerformanceAttribution,
+    load_latest_snapshot,
+    save_snapshot,
+)
+from services.performance_attribution import snapshot
+import pandas as pd
+import pickle
+import gzip
+import os
+
+
+def _performance_attribution(total_return_mxn=0.01):
+    portfolio_df = pd.DataFrame(
+        {"name": ["A", "B"], "weight": [0.6, 0.4]}, index=["AAA", "BBB"]
+    )
+    index = pd.date_range("2024-03-14 08:30", periods=3, freq="5min")
+    return PerformanceAttribution.from_snapshot(
+        {
+            "start_date": "2024-03-13",
+            "end_date": "2024-03-14",
+            "portfolio_df": portfolio_df,
+            "attribution_df": portfolio_df.assign(ctr_mxn=[0.006, 0.004]),
+            "total_return_mxn": total_return_mxn,
+            "total_return_usd": 0.008,
+            "total_equity_effect": 0.008,
+            "total_fx_effect": total_return_mxn - 0.008,
+            "intraday_portfolio_returns": pd.Series([0.0, 0.5, 1.0], index),
+            "intraday_asset_returns_mxn": pd.DataFrame(
+                0.001, index=index, columns=portfolio_df.index
+            ),
+            "usdmxn_start": 17.0,
+            "usdmxn_end": 17.1,
+            "provider_timestamps": {"pip": datetime.now(timezone.utc)},
+        }
+    )
+
+
+def _write_payload(directory, filename, payload):
+    with gzip.open(os.path.join(directory, filename), "wb") as snapshot_file:
+        pickle.dump(payload, snapshot_file)
+
+
+def test_snapshot_round_trip(tmp_path):
+    perf_attr = _performance_attribution()
+
+    save_snapshot(perf_attr, tmp_path)
+    loaded, created_at = load_latest_snapshot(tmp_path)
+
+    assert isinstance(loaded, PerformanceAttribution)
+    assert created_at is not None
+    assert loaded.asset_prices_start is None
+    assert loaded.total_return_mxn == perf_attr.total_return_mxn
+    assert loaded.usdmxn_end == perf_attr.usdmxn_end
+    pd.testing.assert_frame_equal(
+        loaded.attribution_df, perf_attr.attribution_df
+    )
+    pd.testing.assert_series_equal(
+        loaded.intraday_portfolio_returns, perf_attr.intraday_portfolio_returns
+    )
+
+
+def test_latest_snapshot_is_loaded(tmp_path):
+    save_snapshot(_performance_attribution(0.01), tmp_path)
+    save_snapshot(_performance_attribution(0.02), tmp_path)
+
+    loaded, _ = load_latest_snapshot(tmp_path)
+
+    assert loaded.total_return_mxn == 0.02
+
+
+def test_corrupt_and_incompatible_snapshots_are_skipped(tmp_path):
+    save_snapshot(_performance_attribution(0.01), tmp_path)
+    with open(os.path.join(tmp_path, "snapshot-99990101T0.pkl.gz"), "wb") as f:
+        f.write(b"not a snapshot")
+    _write_payload(
+        tmp_path,
+        "snapshot-99980101T0.pkl.gz",
+        {"version": 0, "created_at": None, "fields": {}},
+    )
+    _write_payload(
+        tmp_path,
+        "snapshot-99970101T0.pkl.gz",
+        {"version": 1, "created_at": None, "fields": {"start_date": "x"}},
+    )
+
+    loaded, _ = load_latest_snapshot(tmp_path)
+
+    assert loaded.total_return_mxn == 0.01
+
+
+def test_no_valid_snapshot(tmp_path):
+    assert load_latest_snapshot(tmp_path) == (None, None)
+    assert load_latest_snapshot(os.path.join(tmp_path, "missing")) == (
+        None,
+        None,
+    )
+
+
+def test_old_snapshots_are_pruned_to_keep(tmp_path):
+    for i in range(5):
+        save_snapshot(_performance_attribution(i / 100), tmp_path, keep=2)
+
+    assert len(os.listdir(tmp_path)) == 2
+    loaded, _ = load_latest_snapshot(tmp_path)
+    assert loaded.total_return_mxn == 0.04
+
+
+def test_pruning_ignores_files_removed_by_another_writer(
+    tmp_path, monkeypatch
+):
+    list_snapshots = snapshot._list_snapshots
+    monkeypatch.setattr(
+        snapshot,
+        "_list_snapshots",
+        lambda directory: list_snapshots(directory)
+        + [os.path.join(directory, "snapshot-00000101T0.pkl.gz")],
+    )
+
+    save_snapshot(_performance_attribution(), tmp_path, keep=1)
+
+    assert len(os.listdir(tmp_path)) == 1
+
+
+def test_store_keeps_refresh_when_saving_fails(tmp_path, monkeypatch):
+    perf_attr = _performance_attribution()
+    monkeypatch.setattr(snapshot, "PerformanceAttribution", lambda: perf_attr)
+
+    def failing_save(*args, **kwargs):
+        raise OSError("No space left on device")
+
+    monkeypatch.setattr(snapshot, "save_snapshot", failing_save)
+
+    store = snapshot.AttributionStore(tmp_path)
+
+    assert store.get() is perf_attr
+    assert not store.is_stale()
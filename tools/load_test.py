@@ -0,0 +1,341 @@
+from clients.alphavantage import alphavantage_client
+from clients.investments import investments_client
+from clients.yahoofinance import yahoo_finance_client
+from services.performance_attribution import main as performance_attribution
+from concurrent.futures import ThreadPoolExecutor
+from collections import Counter
+from datetime import datetime
+from streamlit.runtime import Runtime
+from streamlit.runtime.caching.storage.dummy_cache_storage import (
+    MemoryCacheStorageManager,
+)
+from streamlit.runtime.media_file_manager import MediaFileManager
+from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+from streamlit.testing.v1 import AppTest
+from streamlit.testing.v1.local_script_runner import LocalScriptRunner
+from unittest.mock import MagicMock, patch
+import numpy as np
+import pandas as pd
+import threading
+import argparse
+import resource
+import tempfile
+import time
+import os
+
+_APP_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "streamlit_app.py",
+)
+
+
+class StubProviders:
+    """Replaces every provider call with synthetic data and counts the calls.
+
+    `latency` seconds are slept on each call to mimic the network round trip.
+    """
+
+    def __init__(self, num_tickers, latency):
+        self.latency = latency
+        self.calls = Counter()
+        self._lock = threading.Lock()
+        self._originals = []
+        self.tickers = pd.Index([f"TICK{i}" for i in range(num_tickers)])
+
+    def _record(self, provider):
+        with self._lock:
+            self.calls[provider] += 1
+        time.sleep(self.latency)
+
+    def get_portfolio(self, fund_id):
+        self._record("investments")
+        return pd.DataFrame(
+            {
+                "name": [f"Ticker {ticker}" for ticker in self.tickers],
+                "weight": np.full(len(self.tickers), 1 / len(self.tickers)),
+            },
+            index=self.tickers,
+        )
+
+    def get_intraday_stock_data_yahoo(
+        self, symbols, interval="5m", period="1d"
+    ):
+        self._record("yahoofinance_intraday")
+        index = pd.date_range(
+            datetime.now().replace(hour=14, minute=30, second=0, microsecond=0),
+            periods=78,
+            freq="5min",
+        )
+        returns = np.random.normal(0, 0.001, (len(index), len(symbols)))
+        return pd.DataFrame(
+            100 * np.cumprod(1 + returns, axis=0), index=index, columns=symbols
+        )
+
+    def get_fx_intraday_alphavantage(
+        self, from_symbol, to_symbol, interval="15min"
+    ):
+        self._record("alphavantage_fx_intraday")
+        index = pd.date_range(
+            datetime.now().replace(hour=14, minute=30, second=0, microsecond=0),
+            periods=26,
+            freq="15min",
+        )
+        return pd.DataFrame(
+            {"Close": 17 + np.random.normal(0, 0.01, len(index)).cumsum()},
+            index=index,
+        )
+
+    def get_price_timeseries_alphavantage(
+        self, tickers, start_date, end_date, outputsize="compact"
+    ):
+        self._record("alphavantage_daily")
+        return pd.DataFrame(
+            [
+                np.full(len(tickers), 100.0),
+                100 * (1 + np.random.normal(0, 0.01, len(tickers))),
+            ],
+            index=pd.to_datetime([start_date, end_date]),
+            columns=tickers,
+        )
+
+    def get_fx_daily_alphavantage(
+        self, from_symbol, to_symbol, start_date, end_date, outputsize="compact"
+    ):
+        self._record("alphavantage_fx_daily")
+        return pd.DataFrame(
+            {"Close": [17.0, 17.1]}, index=pd.to_datetime([start_date, end_date])
+        )
+
+    def fetch_mxn_pip(self, date_today):
+        self._record("pip")
+        return 17.1, 17.0
+
+    def _patch(self, target, name, replacement):
+        self._originals.append((target, name, getattr(target, name)))
+        setattr(target, name, replacement)
+
+    def __enter__(self):
+        self._patch(investments_client, "get_portfolio", self.get_portfolio)
+        self._patch(
+            yahoo_finance_client,
+            "get_intraday_stock_data_yahoo",
+            self.get_intraday_stock_data_yahoo,
+        )
+        for name in [
+            "get_fx_intraday_alphavantage",
+            "get_price_timeseries_alphavantage",
+            "get_fx_daily_alphavantage",
+        ]:
+            self._patch(alphavantage_client, name, getattr(self, name))
+        self._patch(performance_attribution, "fetch_mxn_pip", self.fetch_mxn_pip)
+        return self
+
+    def __exit__(self, *exc_info):
+        for target, name, original in reversed(self._originals):
+            setattr(target, name, original)
+        self._originals = []
+
+
+def shared_runtime():
+    """Pin a single mock Streamlit runtime for every concurrent `AppTest`.
+
+    Each `AppTest.run` installs its own mock runtime and clears it when the
+    script ends, which breaks any other session still running in the same
+    process. Patching the lookups keeps all sessions on one runtime, like
+    sessions served by a single Streamlit server.
+    """
+    runtime = MagicMock(spec=Runtime)
+    runtime.media_file_mgr = MediaFileManager(
+        MemoryMediaFileStorage("/mock/media")
+    )
+    runtime.cache_storage_manager = MemoryCacheStorageManager()
+    return patch.multiple(
+        Runtime,
+        instance=MagicMock(return_value=runtime),
+        exists=MagicMock(return_value=True),
+    )
+
+
+class ScriptThreadCpu:
+    """CPU seconds used by `AppTest` script threads, per session thread.
+
+    `AppTest.run` executes the script in a thread of its own, so measuring
+    `time.thread_time` in the session thread alone misses the render. The CPU
+    of every script thread is credited to the thread that started it.
+    """
+
+    def __init__(self):
+        self.cpu_seconds = Counter()
+        self._running = 0
+        self._condition = threading.Condition()
+
+    def wait_for_script_threads(self):
+        with self._condition:
+            self._condition.wait_for(lambda: self._running == 0)
+
+    def patch(self):
+        meter = self
+        original_init = LocalScriptRunner.__init__
+        original_run_script_thread = LocalScriptRunner._run_script_thread
+
+        def __init__(runner, *args, **kwargs):
+            original_init(runner, *args, **kwargs)
+            runner._session_thread = threading.get_ident()
+
+        def _run_script_thread(runner):
+            # The thread starts before AppTest.run returns, so it is counted
+            # before wait_for_script_threads can be called
+            with meter._condition:
+                meter._running += 1
+            start = time.thread_time()
+            try:
+                original_run_script_thread(runner)
+            finally:
+                with meter._condition:
+                    meter.cpu_seconds[runner._session_thread] += (
+                        time.thread_time() - start
+                    )
+                    meter._running -= 1
+                    meter._condition.notify_all()
+
+        return patch.multiple(
+            LocalScriptRunner,
+            __init__=__init__,
+            _run_script_thread=_run_script_thread,
+        )
+
+
+def run_session(num_reruns, timeout):
+    """Render the app once plus `num_reruns` reruns.
+
+    Returns the latency of each render, the CPU seconds of the session thread
+    and the session thread id (script threads are credited to it).
+    """
+    app = AppTest.from_file(_APP_PATH, default_timeout=timeout)
+    latencies = []
+    cpu_start = time.thread_time()
+    for _ in range(num_reruns + 1):
+        start = time.perf_counter()
+        app.run()
+        latencies.append(time.perf_counter() - start)
+        if app.exception:
+            raise RuntimeError(app.exception[0].message)
+    return latencies, time.thread_time() - cpu_start, threading.get_ident()
+
+
+def run_load_test(
+    num_sessions, num_reruns, num_tickers, provider_latency, timeout=60
+):
+    """Simulate `num_sessions` concurrent dashboard sessions.
+
+    Returns a dict with render latency percentiles in seconds, mean and max
+    CPU seconds per session (the session thread plus its script threads) and
+    provider calls per session. Sessions share one process, so peak RSS
+    growth (MB) is measured for the whole process and divided by the number
+    of sessions; once the process is warm it can be 0.
+    """
+    script_thread_cpu = ScriptThreadCpu()
+    # Keep the run isolated from any real snapshots on disk
+    with tempfile.TemporaryDirectory(
+        prefix="risky-hayek-load-"
+    ) as snapshot_dir, patch.dict(
+        os.environ, {"SNAPSHOT_DIR": snapshot_dir}
+    ), shared_runtime(), script_thread_cpu.patch(), StubProviders(
+        num_tickers, provider_latency
+    ) as providers:
+        max_rss_start = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        wall_start = time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=num_sessions) as executor:
+            futures = [
+                executor.submit(run_session, num_reruns, timeout)
+                for _ in range(num_sessions)
+            ]
+            results = [future.result() for future in futures]
+
+        wall_seconds = time.perf_counter() - wall_start
+        script_thread_cpu.wait_for_script_threads()
+        max_rss_growth = (
+            resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - max_rss_start
+        )
+
+    latencies = [
+        latency
+        for session_latencies, _, _ in results
+        for latency in session_latencies
+    ]
+    session_cpu_seconds = [
+        cpu_seconds + script_thread_cpu.cpu_seconds[session_thread]
+        for _, cpu_seconds, session_thread in results
+    ]
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    return {
+        "sessions": num_sessions,
+        "renders": len(latencies),
+        "wall_seconds": wall_seconds,
+        "latency_p50": p50,
+        "latency_p95": p95,
+        "latency_p99": p99,
+        "cpu_seconds_per_session": np.mean(session_cpu_seconds),
+        "cpu_seconds_per_session_max": np.max(session_cpu_seconds),
+        # ru_maxrss is reported in KB on Linux
+        "process_peak_rss_growth_mb_per_session": max_rss_growth
+        / 1024
+        / num_sessions,
+        "provider_calls_per_session": {
+            provider: calls / num_sessions
+            for provider, calls in sorted(providers.calls.items())
+        },
+    }
+
+
+def print_report(report):
+    print(
+        f"{report['sessions']} sessions, {report['renders']} renders "
+        f"in {report['wall_seconds']:.2f}s"
+    )
+    print(
+        f"Render latency p50 {report['latency_p50']*1000:.0f}ms, "
+        f"p95 {report['latency_p95']*1000:.0f}ms, "
+        f"p99 {report['latency_p99']*1000:.0f}ms"
+    )
+    print(
+        f"CPU per session: mean {report['cpu_seconds_per_session']:.3f}s, "
+        f"max {report['cpu_seconds_per_session_max']:.3f}s"
+    )
+    print(
+        f"Process peak RSS growth ÷ sessions: "
+        f"{report['process_peak_rss_growth_mb_per_session']:.2f}MB"
+    )
+    print("Provider calls per session:")
+    for provider, calls in report["provider_calls_per_session"].items():
+        print(f"  {provider}: {calls:.2f}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        prog="python -m tools.load_test",
+        description="Load test the Streamlit dashboard with stubbed providers."
+    )
+    parser.add_argument("--sessions", type=int, default=10)
+    parser.add_argument("--reruns", type=int, default=2)
+    parser.add_argument("--tickers", type=int, default=20)
+    parser.add_argument(
+        "--provider-latency",
+        type=float,
+        default=0.2,
+        help="Seconds slept on each stubbed provider call",
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    print_report(
+        run_load_test(
+            num_sessions=args.sessions,
+            num_reruns=args.reruns,
+            num_tickers=args.tickers,
+            provider_latency=args.provider_latency,
+        )
+    )